@@ -0,0 +1,22 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List
+
+from .client import MetabaseClient
+from .switcher import switch_question, switch_dashboard
+
+
+def switch_many(client: MetabaseClient, jobs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Run several switches through one client so they share its keep-alive connections and GET cache.
+
+    Each job holds the keyword arguments of switch_question (with question_id) or
+    switch_dashboard (with dashboard_id), minus the client.
+    """
+    results: List[Dict[str, Any]] = []
+    for job in jobs:
+        if ("question_id" in job) == ("dashboard_id" in job):
+            raise ValueError("each job must provide exactly one of question_id or dashboard_id")
+        if "question_id" in job:
+            results.append(switch_question(client=client, **job))
+        else:
+            results.append(switch_dashboard(client=client, **job))
+    return results
@@ -16,6 +16,7 @@ def run(
     collection_id: str = Option(None, help='Optional collection to save new question/dashboard into ("root" or numeric ID)'),
     insecure: bool = Option(False, help="Disable TLS verification (accept self-signed certs)"),
     dry_run: bool = Option(False, help="Show planned changes without creating/updating"),
+    max_workers: int = Option(None, min=1, help="Max dashboard questions switched concurrently (default: SOURCE_SWITCHER_MAX_WORKERS or 16)"),
 ):
     # Validate that exactly one of question_id or dashboard_id is provided
     if (question_id is not None) == (dashboard_id is not None):
@@ -58,6 +59,7 @@ def run(
             dashboard_id=dashboard_id,
             collection_id=normalized_collection,
             dry_run=dry_run,
+            max_workers=max_workers,
         )
 
         if dry_run:
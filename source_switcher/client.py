@@ -1,13 +1,67 @@
 from __future__ import annotations
+import os
+import threading
+import time
 import requests
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 from requests.packages.urllib3 import disable_warnings
+from requests.packages.urllib3.util.retry import Retry
+
+try:
+    # orjson decodes large metadata payloads several times faster; fall back to stdlib json when absent
+    import orjson
+
+    def _loads(content: bytes) -> Any:
+        return orjson.loads(content)
+
+    def _dumps(payload: Any) -> bytes:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    import json
+
+    def _loads(content: bytes) -> Any:
+        return json.loads(content)
+
+    def _dumps(payload: Any) -> bytes:
+        # Match requests' json= encoding, which rejects NaN/Infinity rather than emitting invalid JSON
+        return json.dumps(payload, allow_nan=False).encode("utf-8")
+
+try:
+    # ijson lets large /metadata responses be consumed table by table instead of parsed all at once
+    import ijson
+except ImportError:
+    ijson = None
+
+def _max_workers_from_env(default: int = 16) -> int:
+    # A malformed value must not break import; fall back to the default and never go below one worker
+    try:
+        return max(1, int(os.environ.get("SOURCE_SWITCHER_MAX_WORKERS", default)))
+    except ValueError:
+        return default
+
+
+# Upper bound on concurrent Metabase requests; override with SOURCE_SWITCHER_MAX_WORKERS
+DEFAULT_MAX_WORKERS = _max_workers_from_env()
+
 
 class MetabaseClient:
-    def __init__(self, host: str, api_key: Optional[str] = None, session: Optional[requests.Session] = None, insecure: bool = False):
+    def __init__(self, host: str, api_key: Optional[str] = None, session: Optional[requests.Session] = None, insecure: bool = False, cache_ttl: float = 300.0, pool_size: int = 32):
         self.host = host.rstrip('/')
-        self.session = session or requests.Session()
+        # In-memory cache for idempotent GETs: path -> (fetched_at, payload). A ttl <= 0 disables it
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._cache_lock = threading.Lock()
+        if session is None:
+            session = requests.Session()
+            # Size the keep-alive pool for our concurrent fetches and retry transient errors on idempotent requests
+            retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
         self.session.headers.update({"Content-Type": "application/json"})
         # Use API key auth per docs: set X-API-KEY header
         if api_key:
@@ -29,15 +83,38 @@ class MetabaseClient:
     def delete(self, path: str, **kwargs) -> requests.Response:
         return self.session.delete(f"{self.host}{path}", **kwargs)
 
+    @staticmethod
+    def _json(r: requests.Response) -> Any:
+        r.raise_for_status()
+        return _loads(r.content)
+
+    def get_json_cached(self, path: str) -> Any:
+        # Cached payloads are shared between callers and must be treated as read-only
+        if self.cache_ttl > 0:
+            with self._cache_lock:
+                hit = self._cache.get(path)
+            if hit and time.monotonic() - hit[0] < self.cache_ttl:
+                return hit[1]
+        payload = self._json(self.get(path))
+        if self.cache_ttl > 0:
+            with self._cache_lock:
+                self._cache[path] = (time.monotonic(), payload)
+        return payload
+
+    def invalidate_cache(self, prefix: str = "") -> None:
+        # Drop cached entries whose path starts with prefix (everything by default)
+        with self._cache_lock:
+            for path in [p for p in self._cache if p.startswith(prefix)]:
+                del self._cache[path]
+
     # Convenience wrappers for common API endpoints
     def fetch_card(self, card_id: int) -> Dict[str, Any]:
-        r = self.get(f"/api/card/{card_id}")
-        r.raise_for_status()
-        return r.json()
+        return self.get_json_cached(f"/api/card/{card_id}")
 
-    def duplicate_card(self, card_id: int, name_suffix: str = " (copy)") -> Dict[str, Any]:
-        # There is no /clone endpoint; to duplicate, fetch the card and create a new one with a different name
-        original = self.fetch_card(card_id)
+    def duplicate_card(self, card_id: int, name_suffix: str = " (copy)", original: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        # There is no /clone endpoint; to duplicate, fetch the card (unless already provided) and create a new one with a different name
+        if original is None:
+            original = self.fetch_card(card_id)
         payload: Dict[str, Any] = {
             "name": f"{original.get('name')}{name_suffix}",
             "description": original.get("description"),
@@ -46,12 +123,12 @@ class MetabaseClient:
             "visualization_settings": original.get("visualization_settings") or {},
             "collection_id": original.get("collection_id"),
         }
-        r = self.post("/api/card", json=payload)
-        r.raise_for_status()
-        return r.json()
+        r = self.post("/api/card", data=_dumps(payload))
+        return self._json(r)
 
     def create_card(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        r = self.post("/api/card", json=payload)
+        # Creating a card leaves every cached GET valid, so nothing is invalidated here
+        r = self.post("/api/card", data=_dumps(payload))
         try:
             r.raise_for_status()
         except requests.HTTPError as e:
@@ -62,36 +139,48 @@ class MetabaseClient:
             except Exception:
                 detail = r.text
             raise requests.HTTPError(f"{e} | response={detail}", response=r) from None
-        return r.json()
+        return _loads(r.content)
 
     def list_tables(self, db_id: int) -> Dict[str, Any]:
         # /api/database/:id/metadata returns tables and fields
-        r = self.get(f"/api/database/{db_id}/metadata")
-        r.raise_for_status()
-        return r.json()
+        return self.get_json_cached(f"/api/database/{db_id}/metadata")
+
+    def stream_tables(self, db_id: int) -> Iterator[Dict[str, Any]]:
+        # Yield the tables of /api/database/:id/metadata one at a time. Without ijson (or when the
+        # payload is already cached) this falls back to the regular list_tables response
+        path = f"/api/database/{db_id}/metadata"
+        if ijson is None or (self.cache_ttl > 0 and path in self._cache):
+            yield from self.list_tables(db_id).get("tables", [])
+            return
+        with self.get(path, stream=True) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            yield from ijson.items(r.raw, "tables.item", use_float=True)
 
     def get_field(self, field_id: int) -> Dict[str, Any]:
-        r = self.get(f"/api/field/{field_id}")
-        r.raise_for_status()
-        return r.json()
+        return self.get_json_cached(f"/api/field/{field_id}")
+
+    def get_fields_bulk(self, field_ids: List[int], max_workers: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        # Metabase has no batch field endpoint, so fan the GETs out over the shared keep-alive pool
+        field_ids = list(dict.fromkeys(field_ids))
+        if not field_ids:
+            return {}
+        workers = min(max_workers or DEFAULT_MAX_WORKERS, len(field_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(field_ids, executor.map(self.get_field, field_ids)))
 
     def list_fields_for_table(self, table_id: int) -> Dict[str, Any]:
-        r = self.get(f"/api/table/{table_id}/query_metadata")
-        r.raise_for_status()
-        return r.json()
+        return self.get_json_cached(f"/api/table/{table_id}/query_metadata")
 
     # Dashboard methods
     def fetch_dashboard(self, dashboard_id: int) -> Dict[str, Any]:
         r = self.get(f"/api/dashboard/{dashboard_id}")
-        r.raise_for_status()
-        return r.json()
+        return self._json(r)
 
     def create_dashboard(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        r = self.post("/api/dashboard", json=payload)
-        r.raise_for_status()
-        return r.json()
+        r = self.post("/api/dashboard", data=_dumps(payload))
+        return self._json(r)
 
     def update_dashboard(self, dashboard_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
-        r = self.put(f"/api/dashboard/{dashboard_id}", json=payload)
-        r.raise_for_status()
-        return r.json()
+        r = self.put(f"/api/dashboard/{dashboard_id}", data=_dumps(payload))
+        return self._json(r)
@@ -1,40 +1,53 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Tuple, Optional
-from copy import deepcopy
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich import print
-import uuid
+from secrets import token_hex
+from types import MappingProxyType
+import sys
+import threading
+import time
+import weakref
 
-from .client import MetabaseClient
+from .client import DEFAULT_MAX_WORKERS, MetabaseClient
 
 
 def remap_parameter_mappings(parameter_mappings: List[Dict[str, Any]], field_mapping: Dict[int, int]) -> List[Dict[str, Any]]:
     """Remap field IDs in parameter_mappings targets."""
+    # Callers update parameter_id/card_id on the result, so mappings are always shallow-copied
+    if not field_mapping:
+        return [dict(pm) for pm in parameter_mappings]
     new_mappings = []
     for pm in parameter_mappings:
-        pm_copy = deepcopy(pm)
+        # Shallow copy; only a target path whose field id changes is rebuilt, the rest stays shared
+        pm_copy = dict(pm)
         target = pm_copy.get("target")
         if isinstance(target, list) and len(target) >= 2 and target[0] == "dimension":
             dimension = target[1]
             if isinstance(dimension, list) and len(dimension) >= 3 and dimension[0] == "field" and isinstance(dimension[1], int):
-                old_field_id = dimension[1]
-                new_field_id = field_mapping.get(old_field_id, old_field_id)
-                pm_copy["target"][1][1] = new_field_id
+                new_field_id = field_mapping.get(dimension[1])
+                if new_field_id is not None and new_field_id != dimension[1]:
+                    new_dimension = ["field", new_field_id, *dimension[2:]]
+                    pm_copy["target"] = ["dimension", new_dimension, *target[2:]]
         new_mappings.append(pm_copy)
     return new_mappings
 
 
 def generate_param_id() -> str:
     """Generate a random parameter ID like '431e0d86'."""
-    return uuid.uuid4().hex[:8]
+    return token_hex(4)
 
 
 def remap_param_fields(param_fields: Dict[str, List[Dict[str, Any]]], field_mapping: Dict[int, int]) -> Dict[str, List[Dict[str, Any]]]:
     """Remap field IDs in param_fields field objects."""
+    if not field_mapping:
+        # Nothing to remap; the field lists are shared, not copied
+        return dict(param_fields)
     new_param_fields = {}
     for param_id, fields in param_fields.items():
         new_fields = []
         for field in fields:
-            field_copy = deepcopy(field)
+            field_copy = dict(field)
             field_id = field_copy.get("id")
             if isinstance(field_id, int):
                 new_field_id = field_mapping.get(field_id, field_id)
@@ -50,92 +63,193 @@ def remap_param_fields(param_fields: Dict[str, List[Dict[str, Any]]], field_mapp
     return new_param_fields
 
 
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class MetadataIndex:
     def __init__(self, db_meta: Dict[str, Any]):
-        self.tables_by_schema_and_name: Dict[Tuple[Optional[str], str], Dict[str, Any]] = {}
-        self.fields_by_path: Dict[Tuple[Optional[str], str, str], Dict[str, Any]] = {}
-        for table in db_meta.get("tables", []):
-            schema = table.get("schema")
-            name = table.get("name")
-            self.tables_by_schema_and_name[(schema, name)] = table
-            for field in table.get("fields", []):
-                field_name = field.get("name")
-                self.fields_by_path[(schema, name, field_name)] = field
+        # Lookup dicts are built on first use. They are nested (schema -> table -> ...) so a lookup is
+        # a chain of single-key hits on interned strings, with no key tuple allocated per call
+        self._tables: Iterable[Dict[str, Any]] = db_meta.get("tables", [])
+        self._tables_by_schema: Optional[Dict[Optional[str], Dict[str, Dict[str, Any]]]] = None
+        self._fields_by_schema: Optional[Dict[Optional[str], Dict[str, Dict[str, Dict[str, Any]]]]] = None
+        self._flat_tables: Optional[Mapping[Tuple[Optional[str], str], Dict[str, Any]]] = None
+        self._flat_fields: Optional[Mapping[Tuple[Optional[str], str, str], Dict[str, Any]]] = None
+        # Cards of a dashboard are switched concurrently and may share one index
+        self._build_lock = threading.Lock()
+
+    def _ensure_built(self) -> None:
+        if self._fields_by_schema is None:
+            with self._build_lock:
+                if self._fields_by_schema is None:
+                    self._build()
+
+    def _build(self) -> None:
+        tables_by_schema: Dict[Optional[str], Dict[str, Dict[str, Any]]] = {}
+        fields_by_schema: Dict[Optional[str], Dict[str, Dict[str, Dict[str, Any]]]] = {}
+        for t in self._tables:
+            schema, name = _intern(t.get("schema")), _intern(t.get("name"))
+            tables_by_schema.setdefault(schema, {})[name] = t
+            fields_by_schema.setdefault(schema, {})[name] = {
+                _intern(f.get("name")): f for f in t.get("fields", ())
+            }
+        self._tables = ()
+        self._tables_by_schema = tables_by_schema
+        # Assigned last: a non-None _fields_by_schema marks the index as built
+        self._fields_by_schema = fields_by_schema
+
+    @classmethod
+    def from_tables(cls, tables: Iterable[Dict[str, Any]]) -> MetadataIndex:
+        """Build the index eagerly from an iterable of tables, e.g. a streamed metadata response."""
+        index = cls({"tables": tables})
+        index._build()
+        return index
+
+    # Flat views keyed by (schema, table[, field]) tuples, kept for callers of the original attributes.
+    # They are built once on first access and are read-only; the find_* methods skip building them
+    @property
+    def tables_by_schema_and_name(self) -> Mapping[Tuple[Optional[str], str], Dict[str, Any]]:
+        self._ensure_built()
+        if self._flat_tables is None:
+            with self._build_lock:
+                if self._flat_tables is None:
+                    self._flat_tables = MappingProxyType({
+                        (schema, name): t
+                        for schema, tables in self._tables_by_schema.items()
+                        for name, t in tables.items()
+                    })
+        return self._flat_tables
+
+    @property
+    def fields_by_path(self) -> Mapping[Tuple[Optional[str], str, str], Dict[str, Any]]:
+        self._ensure_built()
+        if self._flat_fields is None:
+            with self._build_lock:
+                if self._flat_fields is None:
+                    self._flat_fields = MappingProxyType({
+                        (schema, table, name): f
+                        for schema, tables in self._fields_by_schema.items()
+                        for table, fields in tables.items()
+                        for name, f in fields.items()
+                    })
+        return self._flat_fields
 
     def find_field(self, schema: Optional[str], table: str, field: str) -> Optional[Dict[str, Any]]:
-        return self.fields_by_path.get((schema, table, field))
-
-    def find_table(self, schema: Optional[str], table: str) -> Optional[Dict[str, Any]]:
-        return self.tables_by_schema_and_name.get((schema, table))
-
-
-def extract_used_field_ids(card: Dict[str, Any]) -> List[int]:
-    dataset_query = card.get("dataset_query") or {}
-    query = dataset_query.get("query") or {}
+        self._ensure_built()
+        return self._fields_by_schema.get(schema, {}).get(table, {}).get(field)
 
-    used: List[int] = []
+    def find_fields_in_table(self, schema: Optional[str], table: str) -> Dict[str, Dict[str, Any]]:
+        """Return the table's fields keyed by name, for resolving several fields of one table."""
+        self._ensure_built()
+        return self._fields_by_schema.get(schema, {}).get(table, {})
 
-    def visit(node: Any):
-        if isinstance(node, dict):
+    def find_table(self, schema: Optional[str], table: str) -> Optional[Dict[str, Any]]:
+        self._ensure_built()
+        return self._tables_by_schema.get(schema, {}).get(table)
+
+
+def scan_query(dataset_query: Dict[str, Any]) -> Tuple[Set[int], Set[int]]:
+    """Collect field ref ids and 'source-field' ids from an MBQL query in a single walk."""
+    query = (dataset_query or {}).get("query")
+    if not query or type(query) not in (dict, list):
+        # Native SQL questions have no MBQL "query" to walk
+        return set(), set()
+
+    used: Set[int] = set()
+    source_fields: Set[int] = set()
+
+    # Walk with an explicit stack so deeply nested MBQL can't hit the recursion limit. The query is
+    # parsed JSON, so exact type checks are enough, and only containers are pushed on the stack.
+    _dict, _list, _int = dict, list, int
+    add_used, add_source_field = used.add, source_fields.add
+    stack: List[Any] = [query]
+    push, pop = stack.append, stack.pop
+    while stack:
+        node = pop()
+        if type(node) is _dict:
             # Look for field refs like ["field", field_id, opts]
-            if node.get("field") is not None and isinstance(node.get("field"), list):
-                arr = node.get("field")
-                if len(arr) >= 2 and isinstance(arr[1], int):
-                    used.append(arr[1])
-            for v in node.values():
-                visit(v)
-        elif isinstance(node, list):
+            arr = node.get("field")
+            if type(arr) is _list and len(arr) >= 2 and type(arr[1]) is _int:
+                add_used(arr[1])
+            v = node.get("source-field")
+            if type(v) is _int:
+                add_source_field(v)
+            children = node.values()
+        else:
             # MBQL expressions, e.g., ["field", 123, {...}] inside arrays
-            if len(node) >= 2 and node[0] == "field" and isinstance(node[1], int):
-                used.append(node[1])
-            for v in node:
-                visit(v)
+            if len(node) >= 2 and node[0] == "field" and type(node[1]) is _int:
+                add_used(node[1])
+            children = node
+        for child in children:
+            child_type = type(child)
+            if child_type is _dict or child_type is _list:
+                push(child)
+
+    return used, source_fields
 
-    visit(query)
 
-    # Deduplicate
-    return sorted(set(used))
+def extract_used_field_ids(card: Dict[str, Any]) -> List[int]:
+    return sorted(scan_query(card.get("dataset_query"))[0])
 
 
-def build_field_path_map(client: MetabaseClient, field_ids: List[int]) -> Dict[int, Tuple[Optional[str], str, str]]:
+def build_field_path_map(
+    client: MetabaseClient,
+    field_ids: List[int],
+    max_workers: Optional[int] = None,
+    known_paths: Optional[Dict[int, Tuple[Optional[str], str, str]]] = None,
+) -> Dict[int, Tuple[Optional[str], str, str]]:
     id_to_path: Dict[int, Tuple[Optional[str], str, str]] = {}
+    # Resolve from already-fetched DB metadata first; only unknown ids (e.g. cross-DB joins) hit the API
+    missing: List[int] = []
     for fid in field_ids:
-        f = client.get_field(fid)
-        table = f.get("table")
-        schema = table.get("schema") if table else None
-        table_name = table.get("name") if table else None
-        field_name = f.get("name")
+        path = known_paths.get(fid) if known_paths else None
+        if path:
+            id_to_path[fid] = path
+        else:
+            missing.append(fid)
+    if not missing:
+        return id_to_path
+    fields = client.get_fields_bulk(missing, max_workers=max_workers)
+    for fid in missing:
+        f = fields[fid]
+        table = f.get("table") or {}
+        schema, table_name, field_name = table.get("schema"), table.get("name"), f.get("name")
         if table_name and field_name:
             id_to_path[fid] = (schema, table_name, field_name)
     return id_to_path
 
 
 def build_table_id_to_path(db_meta: Dict[str, Any]) -> Dict[int, Tuple[Optional[str], str]]:
-    mapping: Dict[int, Tuple[Optional[str], str]] = {}
-    for table in db_meta.get("tables", []):
-        table_id = table.get("id")
-        if table_id is not None:
-            mapping[table_id] = (table.get("schema"), table.get("name"))
-    return mapping
+    return {
+        t["id"]: (t.get("schema"), t.get("name"))
+        for t in db_meta.get("tables", ())
+        if t.get("id") is not None
+    }
 
 
-def collect_source_field_ids(dataset_query: Dict[str, Any]) -> List[int]:
-    # Traverse the query object to gather any integers referenced under the key 'source-field'
-    ids: List[int] = []
-    query = (dataset_query or {}).get("query") or {}
+def build_source_paths(
+    tables: Iterable[Dict[str, Any]],
+) -> Tuple[Dict[int, Tuple[Optional[str], str]], Dict[int, Tuple[Optional[str], str, str]]]:
+    """Build the table id and field id -> path maps in a single pass over (possibly streamed) tables."""
+    table_paths: Dict[int, Tuple[Optional[str], str]] = {}
+    field_paths: Dict[int, Tuple[Optional[str], str, str]] = {}
+    for t in tables:
+        schema, table_name = t.get("schema"), t.get("name")
+        if t.get("id") is not None:
+            table_paths[t["id"]] = (schema, table_name)
+        if table_name:
+            field_paths.update({
+                f["id"]: (schema, table_name, f["name"])
+                for f in t.get("fields", ())
+                if f.get("id") is not None and f.get("name")
+            })
+    return table_paths, field_paths
 
-    def visit(node: Any):
-        if isinstance(node, dict):
-            for k, v in node.items():
-                if k == "source-field" and isinstance(v, int):
-                    ids.append(v)
-                visit(v)
-        elif isinstance(node, list):
-            for v in node:
-                visit(v)
 
-    visit(query)
-    return sorted(set(ids))
+def collect_source_field_ids(dataset_query: Dict[str, Any]) -> List[int]:
+    # Gather any integers referenced under the key 'source-field'
+    return sorted(scan_query(dataset_query)[1])
 
 
 def transform_dataset_query(
@@ -145,60 +259,217 @@ def transform_dataset_query(
     target_db_id: int,
     source_table_id_to_path: Optional[Dict[int, Tuple[Optional[str], str]]] = None,
 ) -> Dict[str, Any]:
-    dq = deepcopy(dataset_query)
-    dq["database"] = target_db_id
-
-    # Build reverse lookup: path -> target field id
-    path_to_target_field_id: Dict[Tuple[Optional[str], str, str], int] = {}
-    for path, _ in {(path, fid) for fid, path in source_paths.items()}:
-        target_field = target_index.find_field(*path)
-        if target_field:
-            path_to_target_field_id[path] = target_field["id"]
-
-    # Map top-level source table if present and we can resolve it
-    query_obj = dq.get("query") or {}
-    if source_table_id_to_path and isinstance(query_obj.get("source-table"), int):
-        src_tid = query_obj.get("source-table")
-        path = source_table_id_to_path.get(src_tid)
-        if path:
-            tgt_table = target_index.find_table(path[0], path[1])
-            if tgt_table:
-                query_obj["source-table"] = tgt_table.get("id")
-                dq["query"] = query_obj
-
-    # Build a direct mapping: source_field_id -> target_field_id for quick lookups
+    # No deepcopy: replace() below copies only the branches it rewrites and shares the rest with
+    # the input, so callers must not mutate nested parts of the result
+    dq = {**dataset_query, "database": target_db_id}
+    if not dq.get("query"):
+        return dq
+
+    # Build a direct mapping: source_field_id -> target_field_id for quick lookups. Queries touch
+    # many fields of the same table, so group by table and look each table up once
+    fields_by_table: Dict[Tuple[Optional[str], str], List[Tuple[int, str]]] = {}
+    for fid, (schema, table, field) in source_paths.items():
+        fields_by_table.setdefault((schema, table), []).append((fid, field))
     source_field_id_to_target: Dict[int, int] = {}
-    for fid, path in source_paths.items():
-        tgt_field = target_index.find_field(*path)
-        if tgt_field:
-            source_field_id_to_target[fid] = tgt_field["id"]
-
-    def replace(node: Any) -> Any:
-        if isinstance(node, list):
+    for (schema, table), fields in fields_by_table.items():
+        target_fields = target_index.find_fields_in_table(schema, table)
+        for fid, field in fields:
+            tgt_field = target_fields.get(field)
+            if tgt_field:
+                source_field_id_to_target[fid] = tgt_field["id"]
+
+    # Map source tables (top-level and inside joins) by path; they are few, so resolve on demand
+    source_table_id_to_path = source_table_id_to_path or {}
+
+    def target_table_for(table_id: int) -> int:
+        path = source_table_id_to_path.get(table_id)
+        tgt_table = target_index.find_table(path[0], path[1]) if path else None
+        return tgt_table["id"] if tgt_table else table_id
+
+    # Rebuild only the branches that change; unchanged subtrees are returned as-is (shared with the
+    # input). The query comes from parsed JSON, so exact type checks suffice. Builtins and lookups
+    # are bound as default arguments so they are read as fast locals rather than cells/globals.
+    def replace(
+        node: Any,
+        _list: type = list,
+        _dict: type = dict,
+        _int: type = int,
+        target_id_for: Callable[..., Optional[int]] = source_field_id_to_target.get,
+        target_table_for: Callable[[int], int] = target_table_for,
+    ) -> Any:
+        node_type = type(node)
+        if node_type is _list:
             # Field reference shape: ["field", field_id, opts]
-            if len(node) >= 2 and node[0] == "field" and isinstance(node[1], int):
-                fid = node[1]
-                path = source_paths.get(fid)
-                if path and path in path_to_target_field_id:
+            if len(node) >= 2 and node[0] == "field" and type(node[1]) is _int:
+                tgt_id = target_id_for(node[1])
+                if tgt_id is not None:
                     # Also transform the trailing elements (e.g., options dict with source-field)
-                    transformed_tail = [replace(v) for v in node[2:]]
-                    return ["field", path_to_target_field_id[path]] + transformed_tail
-            return [replace(v) for v in node]
-        if isinstance(node, dict):
-            new_obj: Dict[str, Any] = {}
+                    return ["field", tgt_id, *[replace(v) for v in node[2:]]]
+            new_list: Optional[List[Any]] = None
+            for i, v in enumerate(node):
+                v_type = type(v)
+                new_v = replace(v) if v_type is _list or v_type is _dict else v
+                if new_list is None and new_v is not v:
+                    new_list = node[:i]
+                if new_list is not None:
+                    new_list.append(new_v)
+            return node if new_list is None else new_list
+        if node_type is _dict:
+            new_obj: Optional[Dict[str, Any]] = None
             for k, v in node.items():
-                if k == "source-field" and isinstance(v, int):
-                    mapped = source_field_id_to_target.get(v)
-                    new_obj[k] = mapped if mapped is not None else v
+                v_type = type(v)
+                if v_type is _list or v_type is _dict:
+                    new_v = replace(v)
+                elif k == "source-field" and v_type is _int:
+                    new_v = target_id_for(v, v)
+                elif k == "source-table" and v_type is _int:
+                    new_v = target_table_for(v)
                 else:
-                    new_obj[k] = replace(v)
-            return new_obj
+                    continue
+                if new_obj is None and new_v is not v:
+                    new_obj = _dict(node)
+                if new_obj is not None:
+                    new_obj[k] = new_v
+            return node if new_obj is None else new_obj
         return node
 
-    dq["query"] = replace(dq.get("query"))
+    # Same rewrite as replace() with an explicit stack, for queries nested past the recursion limit.
+    # The per-node frame bookkeeping makes it ~40% slower, so it is only the fallback. Each frame is
+    # [node, keys, next position, copy]; copy stays None until a child changes. open_frame gets the
+    # bindings as its own defaults so they stay fast locals in both functions.
+    def replace_iterative(
+        root: Any,
+        _list: type = list,
+        _dict: type = dict,
+        _int: type = int,
+        target_id_for: Callable[..., Optional[int]] = source_field_id_to_target.get,
+        target_table_for: Callable[[int], int] = target_table_for,
+    ) -> Any:
+        def open_frame(
+            node: Any,
+            _list: type = _list,
+            _dict: type = _dict,
+            _int: type = _int,
+            target_id_for: Callable[..., Optional[int]] = target_id_for,
+        ) -> List[Any]:
+            if type(node) is _dict:
+                return [node, _list(node), 0, None]
+            copy = None
+            # Field reference shape: ["field", field_id, opts]; the tail (e.g. an options dict
+            # with source-field) is still walked
+            if len(node) >= 2 and node[0] == "field" and type(node[1]) is _int:
+                tgt_id = target_id_for(node[1])
+                if tgt_id is not None:
+                    copy = node[:]
+                    copy[1] = tgt_id
+            return [node, range(len(node)), 0, copy]
+
+        root_type = type(root)
+        if root_type is not _list and root_type is not _dict:
+            return root
+        stack = [open_frame(root)]
+        while True:
+            frame = stack[-1]
+            node, keys, pos, copy = frame
+            is_dict = type(node) is _dict
+            descended = False
+            while pos < len(keys):
+                key = keys[pos]
+                pos += 1
+                v = node[key]
+                v_type = type(v)
+                if v_type is _list or v_type is _dict:
+                    frame[2] = pos
+                    stack.append(open_frame(v))
+                    descended = True
+                    break
+                if is_dict and v_type is _int:
+                    if key == "source-field":
+                        new_v = target_id_for(v, v)
+                    elif key == "source-table":
+                        new_v = target_table_for(v)
+                    else:
+                        continue
+                    if new_v is not v:
+                        if copy is None:
+                            copy = frame[3] = _dict(node)
+                        copy[key] = new_v
+            if descended:
+                continue
+            # All children handled: hand the (possibly rewritten) node to its parent
+            stack.pop()
+            result = node if copy is None else copy
+            if not stack:
+                return result
+            parent = stack[-1]
+            parent_node, parent_keys, parent_pos, parent_copy = parent
+            key = parent_keys[parent_pos - 1]
+            if result is not parent_node[key]:
+                if parent_copy is None:
+                    parent_copy = parent[3] = _dict(parent_node) if type(parent_node) is _dict else parent_node[:]
+                parent_copy[key] = result
+
+    try:
+        dq["query"] = replace(dq["query"])
+    except RecursionError:
+        # Nested past the recursion limit: redo the rewrite with the explicit-stack walk
+        dq["query"] = replace_iterative(dq["query"])
     return dq
 
 
+# Built metadata lookups per client, keyed by (kind, db_id) -> (built_at, lookups). Entries expire with
+# the client's cache_ttl so repeated jobs on one client skip re-fetching and re-indexing a database.
+# The cached lookups are shared between jobs and must be treated as read-only
+_lookup_cache: "weakref.WeakKeyDictionary[MetabaseClient, Dict[Tuple[str, int], Tuple[float, Any]]]" = weakref.WeakKeyDictionary()
+_lookup_cache_lock = threading.Lock()
+
+
+def _cached_lookup(client: MetabaseClient, kind: str, db_id: int, build: Callable[[], Any]) -> Any:
+    if client.cache_ttl > 0:
+        with _lookup_cache_lock:
+            hit = _lookup_cache.get(client, {}).get((kind, db_id))
+        if hit and time.monotonic() - hit[0] < client.cache_ttl:
+            return hit[1]
+    value = build()
+    if client.cache_ttl > 0:
+        with _lookup_cache_lock:
+            _lookup_cache.setdefault(client, {})[(kind, db_id)] = (time.monotonic(), value)
+    return value
+
+
+def invalidate_metadata_indices(client: MetabaseClient, db_id: Optional[int] = None) -> None:
+    """Drop the client's cached metadata lookups for db_id (all databases by default)."""
+    # Without ijson the lookups are rebuilt from the client's cached metadata payload, so drop that too
+    client.invalidate_cache("/api/database/" if db_id is None else f"/api/database/{db_id}/")
+    with _lookup_cache_lock:
+        entries = _lookup_cache.get(client)
+        if entries is None:
+            return
+        for key in [k for k in entries if db_id is None or k[1] == db_id]:
+            del entries[key]
+
+
+def _prepare_indices(
+    client: MetabaseClient,
+    source_db_id: int,
+    target_db_id: int,
+) -> Tuple[MetadataIndex, Dict[int, Tuple[Optional[str], str]], Dict[int, Tuple[Optional[str], str, str]]]:
+    """Fetch source/target metadata and build the lookups shared by every card being switched."""
+    # Metadata is consumed as it streams in, so each DB's lookups are built in a single pass
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        src_future = executor.submit(
+            _cached_lookup, client, "source", source_db_id,
+            lambda: build_source_paths(client.stream_tables(source_db_id)),
+        )
+        tgt_future = executor.submit(
+            _cached_lookup, client, "target", target_db_id,
+            lambda: MetadataIndex.from_tables(client.stream_tables(target_db_id)),
+        )
+        src_table_id_to_path, src_field_id_to_path = src_future.result()
+        target_index = tgt_future.result()
+    return target_index, src_table_id_to_path, src_field_id_to_path
+
+
 def switch_question(
     client: MetabaseClient,
     source_db_id: int,
@@ -206,40 +477,76 @@ def switch_question(
     question_id: int,
     collection_id: Optional[object] = None,
     dry_run: bool = False,
+    target_index: Optional[MetadataIndex] = None,
+    src_table_id_to_path: Optional[Dict[int, Tuple[Optional[str], str]]] = None,
+    src_field_id_to_path: Optional[Dict[int, Tuple[Optional[str], str, str]]] = None,
 ) -> Dict[str, Any]:
-    # 1) Duplicate the question to preserve original
-    original_card = client.fetch_card(question_id)
-    cloned_card = client.duplicate_card(question_id)
-
-    print(f"[cyan]Cloned original question to ID {cloned_card['id']}")
+    # Callers switching many cards between the same DBs can pass the lookups from _prepare_indices
+    if target_index is None or src_table_id_to_path is None or src_field_id_to_path is None:
+        # 1) Fetch and duplicate the card while both databases' metadata loads; they are independent
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            card_future = executor.submit(_fetch_and_duplicate_card, client, question_id)
+            indices_future = executor.submit(_prepare_indices, client, source_db_id, target_db_id)
+            original_card = card_future.result()
+            target_index, src_table_id_to_path, src_field_id_to_path = indices_future.result()
+    else:
+        original_card = _fetch_and_duplicate_card(client, question_id)
 
-    # 2) Build metadata indices
-    src_meta = client.list_tables(source_db_id)
-    tgt_meta = client.list_tables(target_db_id)
-    target_index = MetadataIndex(tgt_meta)
-    src_table_id_to_path = build_table_id_to_path(src_meta)
-
-    # 3) Extract used field IDs
-    used_field_ids = extract_used_field_ids(original_card)
-    # Also include any 'source-field' references in MBQL option objects
-    extra_source_field_ids = collect_source_field_ids(original_card.get("dataset_query"))
-    all_field_ids = sorted(set(used_field_ids + extra_source_field_ids))
-    id_to_path = build_field_path_map(client, all_field_ids)
-
-    # 4) Transform dataset_query
-    new_dq = transform_dataset_query(
-        dataset_query=original_card.get("dataset_query"),
-        source_paths=id_to_path,
-        target_index=target_index,
+    return _switch_question_with_indices(
+        client=client,
+        original_card=original_card,
         target_db_id=target_db_id,
-        source_table_id_to_path=src_table_id_to_path,
+        target_index=target_index,
+        src_table_id_to_path=src_table_id_to_path,
+        src_field_id_to_path=src_field_id_to_path,
+        collection_id=collection_id,
+        dry_run=dry_run,
     )
 
+
+def _fetch_and_duplicate_card(client: MetabaseClient, question_id: int, original: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fetch the question (unless provided) and duplicate it to preserve the original; returns the original card."""
+    original_card = original if original is not None else client.fetch_card(question_id)
+    cloned_card = client.duplicate_card(question_id, original=original_card)
+    print(f"[cyan]Cloned original question to ID {cloned_card['id']}")
+    return original_card
+
+
+def _switch_question_with_indices(
+    client: MetabaseClient,
+    original_card: Dict[str, Any],
+    target_db_id: int,
+    target_index: MetadataIndex,
+    src_table_id_to_path: Dict[int, Tuple[Optional[str], str]],
+    src_field_id_to_path: Dict[int, Tuple[Optional[str], str, str]],
+    collection_id: Optional[object] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    dataset_query = original_card.get("dataset_query") or {}
+    if dataset_query.get("type") == "native":
+        # SQL can't be remapped by ID; point it at the target DB and leave the query text untouched
+        print(f"[yellow]Question {original_card['id']} is a native query; switching its database only, SQL is not rewritten")
+        new_dq = {**dataset_query, "database": target_db_id}
+    else:
+        # 2) Extract used field IDs, including any 'source-field' references in MBQL option objects
+        used_field_ids, extra_source_field_ids = scan_query(dataset_query)
+        all_field_ids = sorted(used_field_ids | extra_source_field_ids)
+        id_to_path = build_field_path_map(client, all_field_ids, known_paths=src_field_id_to_path)
+
+        # 3) Transform dataset_query
+        new_dq = transform_dataset_query(
+            dataset_query=dataset_query,
+            source_paths=id_to_path,
+            target_index=target_index,
+            target_db_id=target_db_id,
+            source_table_id_to_path=src_table_id_to_path,
+        )
+
     if dry_run:
         print("[yellow]Dry-run: would create new question with transformed dataset_query")
         return {"id": None, "dataset_query": new_dq}
 
-    # 5) Create new question
+    # 4) Create new question
     payload = {
         "name": f"{original_card.get('name')} (switched to DB {target_db_id})",
         "description": original_card.get("description"),
@@ -270,18 +577,31 @@ def switch_dashboard(
     dashboard_id: int,
     collection_id: Optional[object] = None,
     dry_run: bool = False,
+    max_workers: Optional[int] = None,
 ) -> Dict[str, Any]:
     # 1) Fetch the original dashboard
     original_dashboard = client.fetch_dashboard(dashboard_id)
     print(f"[cyan]Fetched dashboard '{original_dashboard.get('name')}' with {len(original_dashboard.get('dashcards', []))} cards and {len(original_dashboard.get('tabs', []))} tabs")
 
-    # 2) Build metadata indices
-    src_meta = client.list_tables(source_db_id)
-    tgt_meta = client.list_tables(target_db_id)
-    target_index = MetadataIndex(tgt_meta)
-
-    # 3) Collect all field IDs from parameter_mappings across dashcards and param_fields
-    all_field_ids: List[int] = []
+    # 2) Build metadata indices once; every card below reuses them
+    target_index, src_table_id_to_path, src_field_id_to_path = _prepare_indices(client, source_db_id, target_db_id)
+
+    # 3) Collect all field IDs from the dashboard's questions, parameter_mappings and param_fields,
+    # so each unique field is resolved once for the whole dashboard rather than once per card
+    # Dashcards often reuse the same question; keep the first occurrence of each so it is switched once
+    unique_card_ids = list(dict.fromkeys(
+        dashcard.get("card_id") for dashcard in original_dashboard.get("dashcards", []) if dashcard.get("card_id")
+    ))
+    all_field_ids: Set[int] = set()
+    cards: Dict[int, Dict[str, Any]] = {}
+    if unique_card_ids:
+        # The fetched cards are handed to the per-card switch below, so each is fetched once
+        with ThreadPoolExecutor(max_workers=min(max_workers or DEFAULT_MAX_WORKERS, len(unique_card_ids))) as executor:
+            cards = dict(zip(unique_card_ids, executor.map(client.fetch_card, unique_card_ids)))
+            for card in cards.values():
+                used_field_ids, extra_source_field_ids = scan_query(card.get("dataset_query"))
+                all_field_ids |= used_field_ids
+                all_field_ids |= extra_source_field_ids
     original_param_fields = original_dashboard.get("param_fields", {})
 
     # From dashcard parameter_mappings
@@ -291,19 +611,21 @@ def switch_dashboard(
             if isinstance(target, list) and len(target) >= 2 and target[0] == "dimension":
                 dimension = target[1]
                 if isinstance(dimension, list) and len(dimension) >= 3 and dimension[0] == "field" and isinstance(dimension[1], int):
-                    all_field_ids.append(dimension[1])
+                    all_field_ids.add(dimension[1])
 
     # From param_fields
     for fields in original_param_fields.values():
         for field in fields:
             field_id = field.get("id")
             if isinstance(field_id, int):
-                all_field_ids.append(field_id)
+                all_field_ids.add(field_id)
 
-    # Build field path map for remapping
+    # Build field path map for remapping. Fields resolved through the API (e.g. from other DBs)
+    # are merged into the source lookup handed to every card
     field_mapping = {}
     if all_field_ids:
-        id_to_path = build_field_path_map(client, all_field_ids)
+        id_to_path = build_field_path_map(client, sorted(all_field_ids), known_paths=src_field_id_to_path)
+        src_field_id_to_path = {**src_field_id_to_path, **id_to_path}
         for fid, path in id_to_path.items():
             tgt_field = target_index.find_field(*path)
             if tgt_field:
@@ -317,25 +639,38 @@ def switch_dashboard(
         old_id = tab.get("id")
         new_id = generate_param_id()
         tab_id_mapping[old_id] = new_id
-        new_tab = deepcopy(tab)
-        new_tab["id"] = new_id
+        new_tab = {**tab, "id": new_id}
         new_tabs.append(new_tab)
 
-    # 4) Switch each question in dashcards
+    # 4) Switch each unique question once; dashcards sharing a card_id all point at the same new card.
+    # Cards are independent, so switch them concurrently
+    def switch_card(card_id: int) -> Dict[str, Any]:
+        return _switch_question_with_indices(
+            client=client,
+            original_card=_fetch_and_duplicate_card(client, card_id, original=cards[card_id]),
+            target_db_id=target_db_id,
+            target_index=target_index,
+            src_table_id_to_path=src_table_id_to_path,
+            src_field_id_to_path=src_field_id_to_path,
+            collection_id=collection_id,
+            dry_run=dry_run,
+        )
+
     card_id_mapping: Dict[int, int] = {}
-    for dashcard in original_dashboard.get("dashcards", []):
-        card_id = dashcard.get("card_id")
-        if card_id:
-            new_card = switch_question(
-                client=client,
-                source_db_id=source_db_id,
-                target_db_id=target_db_id,
-                question_id=card_id,
-                collection_id=collection_id,
-                dry_run=dry_run,
-            )
-            if not dry_run:
-                card_id_mapping[card_id] = new_card["id"]
+    if unique_card_ids:
+        with ThreadPoolExecutor(max_workers=min(max_workers or DEFAULT_MAX_WORKERS, len(unique_card_ids))) as executor:
+            futures = {executor.submit(switch_card, card_id): card_id for card_id in unique_card_ids}
+            for future in as_completed(futures):
+                try:
+                    new_card = future.result()
+                except Exception:
+                    # Stop on the first failure: cancel queued cards so they aren't cloned and created
+                    # for a dashboard that will never exist. Cards already in flight are left to finish
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                if not dry_run:
+                    card_id_mapping[futures[future]] = new_card["id"]
 
     if dry_run:
         print("[yellow]Dry-run: would create new dashboard with switched cards")
@@ -362,8 +697,7 @@ def switch_dashboard(
         old_id = param.get("id")
         new_id = generate_param_id()
         param_id_mapping[old_id] = new_id
-        param_copy = deepcopy(param)
-        param_copy["id"] = new_id
+        param_copy = {**param, "id": new_id}
         new_parameters.append(param_copy)
 
     # Remap param_fields
@@ -376,7 +710,8 @@ def switch_dashboard(
     # Prepare updated dashcards
     updated_dashcards = []
     for dashcard in original_dashboard.get("dashcards", []):
-        dashcard_copy = deepcopy(dashcard)
+        # Shallow copy: only card_id, dashboard_tab_id and parameter_mappings change, the rest is shared
+        dashcard_copy = {**dashcard}
         old_card_id = dashcard_copy.get("card_id")
         if old_card_id and old_card_id in card_id_mapping:
             dashcard_copy["card_id"] = card_id_mapping[old_card_id]
@@ -384,7 +719,8 @@ def switch_dashboard(
         old_tab_id = dashcard_copy.get("dashboard_tab_id")
         if old_tab_id and old_tab_id in tab_id_mapping:
             dashcard_copy["dashboard_tab_id"] = tab_id_mapping[old_tab_id]
-        # Remap parameter_mappings: update parameter_id, card_id, and targets
+        # Remap parameter_mappings: update parameter_id, card_id, and targets. The mappings come
+        # back as fresh copies, so updating them below leaves the original dashboard untouched
         pm_copy = remap_parameter_mappings(
             dashcard_copy.get("parameter_mappings", []), field_mapping
         )